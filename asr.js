@@ -16,6 +16,8 @@ const DUMP_ALL_SEGS = false;
 import fs from "fs";
 import fsp from "fs/promises";
 import path from "path";
+import https from "https";
+import {createHash} from "crypto";
 import {spawn} from "child_process";
 import {fileURLToPath} from "url";
 import {setTimeout as sleep} from "timers/promises";
@@ -80,12 +82,24 @@ const timeMatchMgn =          getNum("--time-match-mgn", 0.3);
 const testMins =              getNum("--test-mins",        0);
 const offsetSec =             chunkSec - trimSec - overlapSec - trimSec;
 const minChunkSec =           trimSec + overlapSec + trimSec;
+// cut chunks at detected silences with no overlap instead of trim/overlap
+const silenceAware =          switches.has("--silence-aware");
+const silenceDb =             getNum("--silence-db",     -35);
+const silenceMinSec =         getNum("--silence-min-sec", 0.3);
+// chunks whose loudest half second is below this rms (full scale = 1)
+// are not sent, 0 disables
+const minChunkRms =           getNum("--min-chunk-rms", 0.001);
+const enableShm =            !switches.has("--no-shm");
 const audioQuality =          flagsKVP.get("--audio-quality") || "max";
 const enablePreprocessing =  !switches.has("--no-preprocess");
 const enableNoiseReduction = !switches.has("--no-denoise");
 const apiTemperature =        getNum("--temperature", 0);
 const apiResponseFormat =     flagsKVP.get("--response-format") || "verbose_json";
 const apiPrompt =             flagsKVP.get("--prompt") || null;
+// number of chunk uploads in flight at once
+const concurrency =           Math.max(1, getNum("--concurrency", 4));
+// reuse API responses for identical chunk audio + request params across runs
+const apiCacheDir =           flagsKVP.get("--api-cache") || null;
 
 // Audio quality settings
 const AUDIO_CONFIGS = {
@@ -96,7 +110,32 @@ const AUDIO_CONFIGS = {
 };
 const audioConfig = AUDIO_CONFIGS[audioQuality];
 
+// Upload encodings: flac is lossless, opus/mp3 are lossy at --upload-bitrate
+// and several times smaller, which mostly matters on slow uplinks
+const uploadBitrate = flagsKVP.get("--upload-bitrate") || "32k";
+const UPLOAD_CODECS = {
+  flac: {args: ["-c:a", "flac"],                              ext: "flac", mime: "audio/flac"},
+  opus: {args: ["-c:a", "libopus",    "-b:a", uploadBitrate], ext: "ogg",  mime: "audio/ogg"},
+  mp3:  {args: ["-c:a", "libmp3lame", "-b:a", uploadBitrate], ext: "mp3",  mime: "audio/mpeg"}
+};
+// the only sample rates libopus accepts
+const OPUS_RATES = [8000, 12000, 16000, 24000, 48000];
+const uploadCodecName = flagsKVP.get("--upload-codec") || "flac";
+const uploadCodec     = UPLOAD_CODECS[uploadCodecName];
+// Voxtral resamples to 16kHz server-side, higher upload rates only add bytes
+const uploadRate =            getNum("--upload-rate", 16000);
+
 /* ---------------- Input validation ---------------- */
+if (!uploadCodec) {
+  console.error(`❌ Error: Unknown --upload-codec ${uploadCodecName}, use one of: ${
+                Object.keys(UPLOAD_CODECS).join(", ")}`);
+  process.exit(1);
+}
+if (uploadCodecName === "opus" && !OPUS_RATES.includes(uploadRate)) {
+  console.error(`❌ Error: --upload-codec opus needs --upload-rate of: ${
+                OPUS_RATES.join(", ")}`);
+  process.exit(1);
+}
 if (positional.length === 0) {
   console.error("❌ Error: No input file specified");
   process.exit(1);
@@ -190,33 +229,102 @@ function run(cmd, args, opts = {}) {
   });
 }
 
-async function getDurationSec(file) {
-  try {
-    const {out} = await run("ffprobe", [
-      "-v", "error",
-      "-show_entries", "format=duration",
-      "-of", "default=nw=1:nk=1",
-      file
-    ]);
-    const sec = parseFloat(out.trim());
-    return Number.isFinite(sec) ? Math.floor(sec) : 0;
-  } catch (e) {
-    console.warn(`Warning: Could not get duration for ${file}: ${e.message}`);
-    return 0;
+// map fn over items with at most `limit` calls in flight, results in input order
+async function mapLimit(items, limit, fn) {
+  const results = new Array(items.length);
+  let next = 0;
+  async function worker() {
+    while (next < items.length) {
+      const idx = next++;
+      results[idx] = await fn(items[idx], idx);
+    }
   }
+  const workers = [];
+  const count   = Math.min(limit, items.length);
+  for (let w = 0; w < count; w++) workers.push(worker());
+  await Promise.all(workers);
+  return results;
 }
 
 /* ---------------- Audio processing ---------------- */
-async function extractAudio(inputVideo, outWav) {
-  const args = [
-    "-y", "-i", inputVideo,
+// ffmpeg input args for the raw pcm written by extractAudio
+function pcmInputArgs() {
+  return ["-f", "s16le", "-ar", String(audioConfig.rate), "-ac", "1"];
+}
+
+// mono s16le is 2 bytes per sample, no header to parse
+async function getPcmDurationSec(pcmPath) {
+  const {size} = await fsp.stat(pcmPath);
+  return Math.floor(size / (2 * audioConfig.rate));
+}
+
+// one fixed read block for all chunks, so memory stays bounded
+// whatever --chunk-sec is; workers take turns through rmsQueue
+const RMS_BLOCK_BYTES = 1 << 20;
+const rmsBlock        = Buffer.alloc(RMS_BLOCK_BYTES);
+const rmsSamples      = new Int16Array(rmsBlock.buffer, rmsBlock.byteOffset,
+                                       RMS_BLOCK_BYTES >> 1);
+let rmsQueue = Promise.resolve();
+
+// rms is taken per frame so one short line in a quiet chunk still counts
+const RMS_FRAME_SEC = 0.5;
+
+// loudest frame rms of a chunk, read straight from the pcm, full scale = 1
+function getChunkPeakRms(pcmPath, chunkInfo) {
+  const result = rmsQueue.then(() => readChunkPeakRms(pcmPath, chunkInfo));
+  rmsQueue = result.catch(() => {});
+  return result;
+}
+
+async function readChunkPeakRms(pcmPath, chunkInfo) {
+  const first       = Math.floor(chunkInfo.chunkStart * audioConfig.rate);
+  const count       = Math.floor(chunkInfo.chunkEnd * audioConfig.rate) - first;
+  const frameLength = Math.max(1, Math.round(RMS_FRAME_SEC * audioConfig.rate));
+  let peakMeanSq = 0;
+  let frameSumSq = 0;
+  let frameCount = 0;
+  let total      = 0;
+  const fh = await fsp.open(pcmPath, "r");
+  try {
+    while (total < count) {
+      const want = Math.min(RMS_BLOCK_BYTES, (count - total) * 2);
+      const {bytesRead} = await fh.read(rmsBlock, 0, want, (first + total) * 2);
+      const n = bytesRead >> 1;
+      if (n === 0) break;
+      // frames run across block boundaries
+      for (let i = 0; i < n; i++) {
+        frameSumSq += rmsSamples[i] * rmsSamples[i];
+        if (++frameCount === frameLength) {
+          peakMeanSq = Math.max(peakMeanSq, frameSumSq / frameCount);
+          frameSumSq = frameCount = 0;
+        }
+      }
+      total += n;
+    }
+  } finally {
+    await fh.close();
+  }
+  // short tail frame
+  if (frameCount > 0) peakMeanSq = Math.max(peakMeanSq, frameSumSq / frameCount);
+  return Math.sqrt(peakMeanSq) / 32768;
+}
+
+// decode, filter and resample in a single ffmpeg pass
+// output is headerless mono s16le so it can be sized and seeked directly
+async function extractAudio(inputVideo, outPcm) {
+  const args = ["-y", "-i", inputVideo];
+  // downmix/resample ahead of the filters, as the old separate pass did
+  if (enablePreprocessing) args.push("-af",
+    `aformat=channel_layouts=mono:sample_rates=${audioConfig.rate},${
+     getAudioFilter()}`);
+  args.push(
     "-ac", "1",
     "-ar", String(audioConfig.rate),
-    "-b:a", audioConfig.bitrate,
+    "-c:a", "pcm_s16le",
     "-vn"
-  ];
+  );
   if (testMins > 0) args.push("-t", String(testMins * 60));
-  args.push(outWav);
+  args.push("-f", "s16le", outPcm);
   await run("ffmpeg", args);
 }
 
@@ -269,7 +377,7 @@ async function extractAudio(inputVideo, outWav) {
 
 let haveDumpedFFmpeg = false;
 
-async function preprocessAudio(inputWav, outputWav) {
+function getAudioFilter() {
   const filters = [];
   if (enableNoiseReduction) {
     filters.push(
@@ -290,16 +398,7 @@ async function preprocessAudio(inputWav, outputWav) {
 
   if(!haveDumpedFFmpeg) console.log({audioFilter});
   haveDumpedFFmpeg = true;
-
-  await run("ffmpeg", [
-    "-y", "-i", inputWav,
-    "-af", audioFilter,
-    "-ac", "1",
-    "-ar", String(audioConfig.rate),
-    "-b:a", audioConfig.bitrate,
-    "-f", "wav",
-    outputWav
-  ]);
+  return audioFilter;
 }
 // chunkSec=20 trimSec=3 overlapSec=3 offsetSec=11 minChunkSec=6
 // t:trim o:overlap C:exclusive content
@@ -316,8 +415,7 @@ async function preprocessAudio(inputWav, outputWav) {
 // tttoooCCCCCCCCooottt
 //            tttoooCCC
 
-async function getChunks(inWav) {
-  const totalDuration = await getDurationSec(inWav);
+function getChunks(totalDuration, workDir) {
   let chunkCount      = Math.ceil(totalDuration / offsetSec);
   const chunks        = [];
   for(let chunkIndex = 0; chunkIndex < chunkCount; chunkIndex++) {
@@ -336,41 +434,97 @@ async function getChunks(inWav) {
       overlapEnd = chunkEnd;
       trimEnd    = chunkEnd;
     }
-    const wavPath = 
-        path.join(tmpDir, `chunk-${String(chunkIndex).padStart(3, "0")}.wav`);
-    await run("ffmpeg", [
-      "-y", "-i", inWav,
-      "-ss", String(chunkStart.toFixed(2)),
-      "-to", String(chunkEnd.toFixed(2)),
-      "-c:a", "pcm_s16le",
-      "-avoid_negative_ts", "make_zero",
-      wavPath
-    ]);
-    chunks.push({ wavPath, chunkIndex, chunkStart, chunkEnd, 
+    const audioPath = chunkAudioPath(workDir, chunkIndex);
+    chunks.push({ audioPath, chunkIndex, chunkStart, chunkEnd, 
                   trimStart, trimEnd, overlapStart, overlapEnd });
   }
   return chunks;
 }
 
+function chunkAudioPath(workDir, chunkIndex) {
+  return path.join(workDir,
+    `chunk-${String(chunkIndex).padStart(3, "0")}.${uploadCodec.ext}`);
+}
+
+// midpoints of silent stretches in seconds, ascending
+async function getSilences(pcmPath) {
+  const {err} = await run("ffmpeg", [
+    "-hide_banner", "-nostats", ...pcmInputArgs(), "-i", pcmPath,
+    "-af", `silencedetect=noise=${silenceDb}dB:d=${silenceMinSec}`,
+    "-f", "null", "-"
+  ]);
+  const silences = [];
+  let silenceStart = null;
+  for (const m of err.matchAll(/silence_(start|end): (-?[\d.]+)/g)) {
+    if (m[1] === "start") silenceStart = Number(m[2]);
+    else if (silenceStart !== null) {
+      silences.push((silenceStart + Number(m[2])) / 2);
+      silenceStart = null;
+    }
+  }
+  return silences;
+}
+
+// silence-aware chunks ...
+// each cut is the last silence in the final quarter of a chunkSec window,
+// or a hard cut at chunkSec if there is none
+// CCCCCCCCCCCCCCCC.  CCCCCCCCCCCCCCCCCC.  CCCCCCCCC
+function getSilenceChunks(totalDuration, silences, workDir) {
+  const chunks = [];
+  let chunkStart = 0;
+  let silenceIdx = 0;
+  for(let chunkIndex = 0; chunkStart < totalDuration; chunkIndex++) {
+    let chunkEnd = Math.min(chunkStart + chunkSec, totalDuration);
+    if(chunkEnd < totalDuration) {
+      const earliestCut = chunkStart + chunkSec * 0.75;
+      const latestCut   = chunkEnd;
+      for(; silenceIdx < silences.length && silences[silenceIdx] <= latestCut;
+            silenceIdx++) {
+        if(silences[silenceIdx] >= earliestCut) chunkEnd = silences[silenceIdx];
+      }
+    }
+    // a tail under 1s is too short to send alone, fold it into this chunk
+    if(totalDuration - chunkEnd < 1) chunkEnd = totalDuration;
+    // nothing is trimmed, margin only absorbs API timestamp rounding
+    chunks.push({ audioPath: chunkAudioPath(workDir, chunkIndex), chunkIndex,
+                  chunkStart, chunkEnd,
+                  trimStart:    chunkStart - 1, trimEnd:    chunkEnd + 1,
+                  overlapStart: chunkStart,     overlapEnd: chunkEnd });
+    chunkStart = chunkEnd;
+  }
+  return chunks;
+}
+
 /* ---------------- Transcription ---------------- */
-async function getFlac(wavPath) {
-  const flacPath = path.join(tmpDir,
-                   path.basename(wavPath, ".wav") + ".flac");
+// cut and encode in one pass, no intermediate chunk wav
+// runs per chunk in the upload workers so encoding overlaps API calls
+async function getUploadAudio(inPcm, chunkInfo) {
+  const {audioPath, chunkStart, chunkEnd} = chunkInfo;
   await run("ffmpeg", [
-    "-y", "-i", wavPath,
-    "-c:a", "flac",
-    flacPath
+    // input seek on raw pcm is an exact byte offset, no decode from 0
+    "-y", ...pcmInputArgs(),
+    "-ss", String(chunkStart.toFixed(2)),
+    "-i", inPcm,
+    "-t", String((chunkEnd - chunkStart).toFixed(2)),
+    "-ar", String(uploadRate),
+    ...uploadCodec.args,
+    // no random ogg serials or version tags, so the same chunk gives the
+    // same bytes every run and --api-cache keys repeat
+    "-fflags", "+bitexact", "-flags:a", "+bitexact",
+    "-avoid_negative_ts", "make_zero",
+    audioPath
   ]);
-  const statSize = (await fsp.stat(flacPath)).size;
-  if (statSize > fileLimit) {
-    console.error(`FLAC file too large: ${statSize} bytes > ${fileLimit} bytes`);
+  // single read; the bytes are reused for every retry and the cache key
+  const buf = await fsp.readFile(audioPath);
+  if (buf.length > fileLimit) {
+    console.error(`Upload file too large: ${buf.length} bytes > ${fileLimit} bytes`);
     process.exit(1);
   }
   return {
-    path:     flacPath,
-    mime:    "audio/flac",
-    filename: path.basename(flacPath),
-    size:     statSize
+    buf,
+    mime:     uploadCodec.mime,
+    filename: path.basename(audioPath),
+    size:     buf.length
   };
 }
 
@@ -378,8 +532,28 @@ const MAX_RETRIES   = 5;
 const BASE_DELAY_MS = 5000;
 const API_TIMEOUT   = 120000; // 2 mins
 
+// keep TLS connections open so each chunk skips the connect/handshake
+const httpsAgent = new https.Agent({keepAlive: true, maxSockets: concurrency});
+
+// key covers the audio bytes and every request field that affects the result
+function apiCacheKey(buf) {
+  return createHash("sha256")
+    .update(JSON.stringify([model, apiResponseFormat, apiTemperature, apiPrompt]))
+    .update(buf)
+    .digest("hex");
+}
+
 async function callApi(uploadInfo) {
-  const buf = await fsp.readFile(uploadInfo.path);
+  const {buf} = uploadInfo;
+  let cachePath = null;
+  if (apiCacheDir) {
+    cachePath = path.join(apiCacheDir, apiCacheKey(buf) + ".json");
+    try {
+      const data = JSON.parse(await fsp.readFile(cachePath, "utf8"));
+      data.delay = 0;
+      return data;
+    } catch {}
+  }
   const apiStart = Date.now();
   let attempt = 0;
   while (true) {
@@ -405,7 +579,8 @@ async function callApi(uploadInfo) {
       response = await axios.post(
         "https://api.mistral.ai/v1/audio/transcriptions", form, {
             headers: {Authorization: `Bearer ${apiKey}`, ...form.getHeaders()},
-            timeout: API_TIMEOUT
+            timeout: API_TIMEOUT,
+            httpsAgent
         }
       );
       // Log successful response (trim audio bytes)
@@ -428,6 +603,14 @@ async function callApi(uploadInfo) {
       continue;
     }
     if (response && response.status === 200) {
+      if (cachePath) {
+        try {
+          await fsp.mkdir(apiCacheDir, {recursive: true});
+          await fsp.writeFile(cachePath, JSON.stringify(response.data), "utf8");
+        } catch (e) {
+          console.warn(`Warning: Could not write API cache ${cachePath}: ${e.message}`);
+        }
+      }
       response.data.delay = Date.now() - apiStart;
       return response.data;
     }
@@ -441,47 +624,73 @@ async function callApi(uploadInfo) {
     continue;
   }
 }
-function processSegments(segments, chunkInfo) {
+// every segment is created here with its full field set, so all stages
+// see one object shape; norm and tokens are filled in by writeSRT
+function makeSegment(start, end, text, chunk) {
+  return {start, end, text, norm: "", tokens: 0, chunk};
+}
+
+function processSegments(segments, chunkInfo, logLines) {
   if (!segments || segments.length === 0) return [];
+  const {chunkIndex, chunkStart, trimStart, trimEnd} = chunkInfo;
   const processedSegments = [];
-  console.log();
+  // one log block per chunk instead of one write per segment
+  const rawLines = [""];
   for (const segment of segments) {
-    if (segment.start === undefined || segment.end === undefined 
-                                    || !segment.text?.trim()) {
+    const text = segment.text?.trim();
+    if (segment.start === undefined || segment.end === undefined || !text) {
       console.error(`Invalid segment (missing start/end/text), chunk ${
-                         chunkInfo.chunkIndex }`);
+                         chunkIndex }`);
       process.exit(1);
     }
-    const start = chunkInfo.chunkStart + segment.start;
-    const end   = chunkInfo.chunkStart + segment.end;
+    const start = chunkStart + segment.start;
+    const end   = chunkStart + segment.end;
 
-    console.log(`RAW: ${chunkInfo.chunkIndex}, ${
-                     vs(start)}, ${vs(end)}, "${segment.text.trim()}"`);
+    rawLines.push(`RAW: ${chunkIndex}, ${vs(start)}, ${vs(end)}, "${text}"`);
 
-    const processedSegment = {
-      start, end,
-      text:  segment.text.trim(),
-      chunk: chunkInfo
-    };
-    if (start > chunkInfo.trimStart &&
-        end   < chunkInfo.trimEnd) 
-      processedSegments.push(processedSegment);
+    if (start > trimStart && end < trimEnd) 
+      processedSegments.push(makeSegment(start, end, text, chunkInfo));
   }
   // console.log(JSON.stringify(processedSegments, null, 2));
-  console.log();
+  rawLines.push("");
+  logLines.push(rawLines.join("\n"));
   return processedSegments;
 }
 
+// zero-padded field strings, built once instead of padStart per field
+const PAD2 = Array.from({length: 100},  (_, n) => String(n).padStart(2, "0"));
+const PAD3 = Array.from({length: 1000}, (_, n) => String(n).padStart(3, "0"));
+
 function toSrtTime(totalSec) {
   const totalMs = Math.max(0, Math.round(totalSec * 1000));
-  const h = String(Math.floor(totalMs / 3600000)).padStart(2, "0");
-  const m = String(Math.floor((totalMs % 3600000) / 60000)).padStart(2, "0");
-  const s = String(Math.floor((totalMs % 60000) / 1000)).padStart(2, "0");
-  const ms3 = String(totalMs % 1000).padStart(3, "0");
-  return `${h}:${m}:${s},${ms3}`;
+  const hours   = Math.floor(totalMs / 3600000);
+  const h = hours < 100 ? PAD2[hours] : String(hours);
+  const m = PAD2[Math.floor((totalMs % 3600000) / 60000)];
+  const s = PAD2[Math.floor((totalMs % 60000) / 1000)];
+  return `${h}:${m}:${s},${PAD3[totalMs % 1000]}`;
 }
 
 /* ---------------- SRT generation ---------------- */
+// \w without "_", so underscores become spaces in the same pass
+const NORM_PUNCT_RE = /[^A-Za-z0-9\s'’]/g;
+const NORM_SPACE_RE = /\s+/g;
+
+// Helper: normalize text for comparisons (lowercase, remove punctuation,
+// collapse whitespace). We keep original text for output but use normalized
+// form to detect duplicates/repeats.
+function normalizeText(s) {
+  if (!s) return "";
+  // remove most punctuation but keep apostrophes; collapse whitespace
+  const cleaned = s.toLowerCase().replace(NORM_PUNCT_RE, ' ')
+                       .replace(NORM_SPACE_RE, ' ').trim();
+  return cleaned;
+}
+
+// normalized text has single spaces and no ends to trim
+function tokenCount(norm) {
+  return norm.length === 0 ? 0 : norm.split(' ').length;
+}
+
 function writeSRT(segments, outputPath) {
   if (!segments || segments.length === 0) {
     console.error("Video has no segments to write:", outputPath);
@@ -489,18 +698,6 @@ function writeSRT(segments, outputPath) {
   }
   const sortedSegments = segments.sort((a, b) => a.start - b.start);
 
-  // Helper: normalize text for comparisons (lowercase, remove punctuation,
-  // collapse whitespace). We keep original text for output but use normalized
-  // form to detect duplicates/repeats.
-  function normalizeText(s) {
-    if (!s) return "";
-    // remove most punctuation but keep apostrophes; collapse whitespace
-    const cleaned = s.toLowerCase().replace(/[^\w\s'’]/g, ' ')
-                         .replace(/_+/g, ' ')
-                         .replace(/\s+/g, ' ').trim();
-    return cleaned;
-  }
-
   // First pass: basic overlap de-dup as before, but preserve original text
   // and attach normalized text for later merging heuristics.
   let lastStart = +1e9;
@@ -512,7 +709,7 @@ function writeSRT(segments, outputPath) {
   for (const segment of sortedSegments) {
     const start = segment.start;
     const end   = segment.end;
-    const text  = segment.text.trim();
+    const text  = segment.text;   // trimmed in processSegments
     try {
       skipSeg  = true;
       if (text.length == 0) continue;
@@ -533,7 +730,12 @@ function writeSRT(segments, outputPath) {
       }
       skipSeg  = false;
     } finally {
-      if (!skipSeg) segOut.push({ start, end, text, norm: normalizeText(text) });
+      if (!skipSeg) {
+        // normalize and count tokens once, the merge passes only compare
+        segment.norm   = normalizeText(text);
+        segment.tokens = tokenCount(segment.norm);
+        segOut.push(segment);
+      }
       if (!hadDuplicate) {
         lastStart = start;
         lastEnd   = end;
@@ -551,30 +753,25 @@ function writeSRT(segments, outputPath) {
   const SHORT_SEG_GAP = 5.0; // seconds - allow joining short repeated segments across this gap
   const SINGLE_TOKEN_WINDOW = 30.0; // seconds - window to collapse repeated single-token captions
 
+  // segOut and mergedSegs are not read again, so segments are merged in place
   for (const seg of segOut) {
     if (mergedSegs.length === 0) {
-      mergedSegs.push({ ...seg });
+      mergedSegs.push(seg);
       continue;
     }
     const last = mergedSegs[mergedSegs.length - 1];
     const gap = seg.start - last.end;
     const segDur = seg.end - seg.start;
     const lastDur = last.end - last.start;
-    const lastNorm = last.norm || normalizeText(last.text);
-    const segNorm = seg.norm || normalizeText(seg.text);
 
     let shouldMerge = false;
-    if (segNorm === lastNorm && segNorm.length > 0) {
+    if (seg.norm === last.norm && seg.tokens > 0) {
       // Overlap or small gap
       if (seg.start <= last.end + GAP_TOL) shouldMerge = true;
       // Short repeated segments across a slightly larger gap
       else if (segDur <= SHORT_SEG_MAX_DUR && lastDur <= SHORT_SEG_MAX_DUR && gap <= SHORT_SEG_GAP) shouldMerge = true;
       // Single-token repeated captions across a larger window
-      else {
-        const lastTokens = lastNorm.split(' ').filter(Boolean).length;
-        const segTokens = segNorm.split(' ').filter(Boolean).length;
-        if (lastTokens === 1 && segTokens === 1 && gap <= SINGLE_TOKEN_WINDOW) shouldMerge = true;
-      }
+      else if (last.tokens === 1 && seg.tokens === 1 && gap <= SINGLE_TOKEN_WINDOW) shouldMerge = true;
     }
 
     if (shouldMerge) {
@@ -584,10 +781,9 @@ function writeSRT(segments, outputPath) {
       // Keep original text from the first occurrence (usually fine) but
       // if incoming has more characters, prefer that (richer text)
       if (seg.text.length > last.text.length) last.text = seg.text;
-      // Refresh normalized form
-      last.norm = segNorm;
+      // norm and tokens already match since seg.norm === last.norm
     } else {
-      mergedSegs.push({ ...seg });
+      mergedSegs.push(seg);
     }
   }
 
@@ -597,69 +793,151 @@ function writeSRT(segments, outputPath) {
   // their span.
   const finalSegs = [];
   for (const seg of mergedSegs) {
-    if (finalSegs.length === 0) { finalSegs.push({ ...seg }); continue; }
+    if (finalSegs.length === 0) { finalSegs.push(seg); continue; }
     const last = finalSegs[finalSegs.length - 1];
-    const lastNorm = last.norm || normalizeText(last.text);
-    const segNorm = seg.norm || normalizeText(seg.text);
-    const lastTokens = lastNorm.split(' ').filter(Boolean).length;
-    const segTokens = segNorm.split(' ').filter(Boolean).length;
     const gap = seg.start - last.end;
     // If both are single-token identical normalized and within a moderate window, collapse
-    if (lastNorm === segNorm && lastTokens === 1 && segTokens === 1 && gap <= SINGLE_TOKEN_WINDOW) {
+    if (last.norm === seg.norm && last.tokens === 1 && seg.tokens === 1 && gap <= SINGLE_TOKEN_WINDOW) {
       last.end = Math.max(last.end, seg.end);
       // prefer longer/original text for display
       if (seg.text.length > last.text.length) last.text = seg.text;
       continue;
     }
-    finalSegs.push({ ...seg });
+    finalSegs.push(seg);
   }
 
   // Write SRT from finalSegs using original (prefer first occurrence) text
-  let srtContent = "";
-  let index = 0;
-  for (const seg of finalSegs) {
-    const startTime = toSrtTime(seg.start);
-    const endTime   = toSrtTime(seg.end);
-    srtContent += `${++index}\n`;
-    srtContent += `${startTime} --> ${endTime}\n`;
-    srtContent += `${seg.text}\n\n`;
-  }
+  // one template per cue, joined once
+  const srtContent = finalSegs.map((seg, idx) =>
+    `${idx + 1}\n${toSrtTime(seg.start)} --> ${toSrtTime(seg.end)}\n${seg.text}\n\n`
+  ).join("");
   fs.writeFileSync(outputPath, srtContent, "utf8");
   console.log(`\n[${ts()}] Wrote: ${path.basename(outputPath)}`);
 }
 
 /* ---------------- Main processing function ---------------- */
-async function processOneVideo(videoPath) {
+// RAM-backed tmpfs keeps the pcm and chunk files off the disk
+const SHM_DIR        = "/dev/shm";
+const SHM_BUDGET_SEC = 3 * 3600; // longest video assumed when sizing shm
+
+// work dirs still on disk or in shm, removed if the run exits early
+const liveWorkDirs = new Set();
+// prints chunk log blocks held back for ordering, set while uploads run
+let flushHeldChunkLogs = null;
+process.on("exit", () => {
+  // a worker's process.exit would otherwise drop already billed RAW lines
+  if (flushHeldChunkLogs) flushHeldChunkLogs();
+  for (const dir of liveWorkDirs) {
+    try { fs.rmSync(dir, {recursive: true, force: true}); } catch {}
+  }
+});
+// exit on signals so the handler above still runs: SIGTERM from `asr kill`,
+// SIGINT from Ctrl-C on a direct `node asr.js`, SIGHUP on terminal close
+process.on("SIGTERM", () => process.exit(143));
+process.on("SIGINT",  () => process.exit(130));
+process.on("SIGHUP",  () => process.exit(129));
+
+// shm when it has room for a worst-case pcm, else tmpDir
+async function getWorkBase() {
+  if (!enableShm) return tmpDir;
+  const sec = testMins > 0 ? testMins * 60 : SHM_BUDGET_SEC;
+  try {
+    const {bavail, bsize} = await fsp.statfs(SHM_DIR);
+    if (bavail * bsize >= sec * audioConfig.rate * 2) return SHM_DIR;
+  } catch {}
+  return tmpDir;
+}
+
+async function makeWorkDir(workBase, workName) {
+  const workDir = path.join(workBase, workName);
+  await fsp.mkdir(workDir, {recursive: true});
+  liveWorkDirs.add(workDir);
+  return workDir;
+}
+
+// pcm and chunk uploads in one call
+async function removeWorkDir(workDir) {
+  await fsp.rm(workDir, {recursive: true, force: true});
+  liveWorkDirs.delete(workDir);
+}
+
+// Extract and plan one video's audio, resolves null if the SRT exists.
+// Work dirs alternate between two slots so the next video can be
+// extracted while the current one is still uploading.
+async function prepareAudio(videoPath, videoIndex) {
+  if (await pathExists(getSrtPath(videoPath))) return null;
+  const workName = `asr-${process.pid}-video-${videoIndex % 2}`;
+  const workBase = await getWorkBase();
+  let workDir    = await makeWorkDir(workBase, workName);
+  let pcmFile    = path.join(workDir, "audio.pcm");
+  console.log(`[${ts()}] Extracting ${
+    enablePreprocessing ? "and preprocessing " : ""}audio: ${
+    path.basename(videoPath)}`);
+  try {
+    await extractAudio(videoPath, pcmFile);
+  } catch (err) {
+    if (workBase !== SHM_DIR) throw err;
+    // shm can still fill up (a longer video, concurrent runs), retry on disk
+    console.log(`[${ts()}] Extraction in ${SHM_DIR} failed, retrying in ${
+                  tmpDir}: ${err.message.trim().split("\n").pop()}`);
+    await removeWorkDir(workDir);
+    workDir = await makeWorkDir(tmpDir, workName);
+    pcmFile = path.join(workDir, "audio.pcm");
+    await extractAudio(videoPath, pcmFile);
+  }
+  const totalDur = await getPcmDurationSec(pcmFile);
+  const chunks   = silenceAware 
+                 ? getSilenceChunks(totalDur, await getSilences(pcmFile), workDir)
+                 : getChunks(totalDur, workDir);
+  return {workDir, pcmFile, totalDur, chunks};
+}
+
+async function processOneVideo(videoPath, audioReady) {
   console.log(`\n[${ts()}] Processing: ${path.basename(videoPath)}`);
   const videoName = path.basename(videoPath, path.extname(videoPath));
-  const srtPath   = getSrtPath(videoPath);
-  if (await pathExists(srtPath)) {
-    console.log(`\n${videoName}: Enhanced SRT already exists, skipping.`);
-    return;
-  }
-  const rawWavFile       = path.join(tmpDir, "audio_raw.wav");
-  const processedWavFile = path.join(tmpDir, "audio_processed.wav");
   try {
-    await extractAudio(videoPath, rawWavFile);
-    let finalWavFile = rawWavFile;
-    if (enablePreprocessing) {
-      console.log(`[${ts()}] Preprocessing audio...`);
-      await preprocessAudio(rawWavFile, processedWavFile);
-      finalWavFile = processedWavFile;
+    const audio = await audioReady;
+    if (!audio) {
+      console.log(`\n${videoName}: Enhanced SRT already exists, skipping.`);
+      return;
     }
-    const totalDur = await getDurationSec(finalWavFile);
-    const chunks   = await getChunks(finalWavFile);
+    const {pcmFile, totalDur, chunks} = audio;
     console.log(`[${ts()}] Duration: ${totalDur.toFixed(0)}s, ${chunks.length} chunks`);
-    const allSegments = [];
-    for (const chunkInfo of chunks) {
+    // Each chunk's log lines are held until every earlier chunk is done,
+    // then printed, so asr.log stays in chunk order with uploads overlapped.
+    const chunkLogs = new Array(chunks.length);
+    let nextLog = 0;
+    const flushChunkLog = (idx, logLines) => {
+      chunkLogs[idx] = logLines;
+      while (nextLog < chunks.length && chunkLogs[nextLog]) {
+        if (chunkLogs[nextLog].length) console.log(chunkLogs[nextLog].join("\n"));
+        chunkLogs[nextLog++] = null;
+      }
+    };
+    // on an early exit print whatever has finished, still in chunk order
+    flushHeldChunkLogs = () => {
+      for (let idx = nextLog; idx < chunks.length; idx++)
+        if (chunkLogs[idx]?.length) console.log(chunkLogs[idx].join("\n"));
+    };
+    // upload chunks concurrently; each chunk's segments are processed as
+    // soon as its response lands, while other uploads are still in flight
+    const chunkSegments = await mapLimit(chunks, concurrency, async (chunkInfo, idx) => {
+      const logLines = [];
       try {
-        const uploadInfo = await getFlac(chunkInfo.wavPath);
+        if (minChunkRms > 0 && 
+            await getChunkPeakRms(pcmFile, chunkInfo) < minChunkRms) {
+          logLines.push(`[${ts()}] Chunk ${
+            (chunkInfo.chunkIndex ).toString().padStart(3)}: ${
+            (chunkInfo.chunkStart).toString().padStart(4)}s ${
+            (chunkInfo.chunkEnd).toString().padStart(4)}s, 🔇 silent, skipped`);
+          return [];
+        }
+        const uploadInfo = await getUploadAudio(pcmFile, chunkInfo);
         const apiData    = await callApi(uploadInfo);
         if (apiData.segments && apiData.segments.length > 0) {
-          const processedSegments = processSegments(apiData.segments, chunkInfo);
-          allSegments.push(...processedSegments);
+          const processedSegments = processSegments(apiData.segments, chunkInfo, logLines);
           if(DUMP_ALL_SEGS)
-            console.log(`[${ts()}] Chunk ${
+            logLines.push(`[${ts()}] Chunk ${
               (chunkInfo.chunkIndex ).toString().padStart(3)}/${
               (chunks.length).toString().padStart(3)} ${
               (chunkInfo.chunkStart).toString().padStart(4)}s ${
@@ -667,20 +945,24 @@ async function processOneVideo(videoPath) {
               Math.round(uploadInfo.size / 1e6).toString().padStart(2)}Mb, ${
               processedSegments.length.toString().padStart(3)} segments, api:${
               Math.round(apiData.delay/1000).toString().padStart(3)}s`);
-          continue;
-        } 
-        else {
-          console.log(`[${ts()}] Chunk ${
-            (chunkInfo.chunkIndex ).toString().padStart(3)}: ${
-            (chunkInfo.chunkStart).toString().padStart(4)}s ${
-            (chunkInfo.chunkEnd).toString().padStart(4)}s, Size: ${
-            Math.round(uploadInfo.size / 1e6).toString().padStart(2)}Mb, ⚠️ no segments`);
-          continue;
+          return processedSegments;
         }
+        logLines.push(`[${ts()}] Chunk ${
+          (chunkInfo.chunkIndex ).toString().padStart(3)}: ${
+          (chunkInfo.chunkStart).toString().padStart(4)}s ${
+          (chunkInfo.chunkEnd).toString().padStart(4)}s, Size: ${
+          Math.round(uploadInfo.size / 1e6).toString().padStart(2)}Mb, ⚠️ no segments`);
+        return [];
       } catch (err) {
-        console.log(`[${ts()}] ${path.basename(videoPath)} | Chunk ${chunkInfo.chunkIndex }/${chunks.length}: ${chunkInfo.chunkStart.toFixed(0)}s-${chunkInfo.chunkEnd.toFixed(0)}s ❌ ${err.message}`);
+        logLines.push(`[${ts()}] ${path.basename(videoPath)} | Chunk ${chunkInfo.chunkIndex }/${chunks.length}: ${chunkInfo.chunkStart.toFixed(0)}s-${chunkInfo.chunkEnd.toFixed(0)}s ❌ ${err.message}`);
+        return [];
+      } finally {
+        flushChunkLog(idx, logLines);
       }
-    }
+    });
+    // chunk order, so DUMP_ALL_SEGS still groups by chunk
+    flushHeldChunkLogs = null;
+    const allSegments = chunkSegments.flat();
     if (allSegments.length === 0) {
       console.error("No transcription segments found");
       process.exit(1);
@@ -709,6 +991,8 @@ async function processOneVideo(videoPath) {
     }
     const outputPath = getSrtPath(videoPath);
     writeSRT(allSegments, outputPath);
+    // the slot is reused two videos later
+    await removeWorkDir(audio.workDir);
   } catch (err) {
     console.error(`[${ts()}] ❌ Failed to process: ${path.basename(videoPath)
                                                      }, ${err.message}`);
@@ -721,17 +1005,28 @@ async function main() {
   console.log(`\nConfiguration:`);
   console.log(`   Test Mode:        ${testMins > 0 ? `${testMins} minutes` : 'OFF'}`);
   console.log(`   Chunk Duration:    ${chunkSec}s`);
-  console.log(`   Trim Duration:     ${trimSec}s`);
-  console.log(`   Overlap Duration:  ${overlapSec}s`);
+  if (silenceAware) {
+    console.log(`   Silence Aware:     ${silenceDb}dB, min ${silenceMinSec}s`);
+  } else {
+    console.log(`   Trim Duration:     ${trimSec}s`);
+    console.log(`   Overlap Duration:  ${overlapSec}s`);
+  }
   console.log(`   Time Match Margin: ${timeMatchMgn}s`);
+  console.log(`   Concurrency:       ${concurrency}`);
   console.log(`   Audio Quality:     ${audioQuality} (${audioConfig.rate}Hz, ${audioConfig.bitrate})`);
+  console.log(`   Upload Rate:       ${uploadRate}Hz`);
+  console.log(`   Upload Codec:      ${uploadCodecName}${
+    uploadCodecName === "flac" ? "" : ` (${uploadBitrate})`}`);
+  console.log(`   Min Chunk RMS:     ${minChunkRms ? `${minChunkRms} (loudest ${RMS_FRAME_SEC}s)` : 'OFF'}`);
   console.log(`   Preprocessing:     ${enablePreprocessing}`);
   console.log(`   Noise Reduction:   ${enableNoiseReduction}`);
+  console.log(`   RAM Work Dir:      ${enableShm ? SHM_DIR + ' (if room)' : 'OFF'}`);
   console.log(`   API Model:         ${model}`);
   console.log(`   API Language:      ${forceLanguage}`);
   console.log(`   API Temperature:   ${apiTemperature}`);
   console.log(`   API Response:      ${apiResponseFormat}`);
   console.log(`   API Prompt:        ${apiPrompt || 'None'}`);
+  console.log(`   API Cache:         ${apiCacheDir || 'OFF'}`);
   console.log(`   File Size Limit:   ${(fileLimit / 1024 / 1024).toFixed(1)}MB`);
   console.log();
 
@@ -765,9 +1060,18 @@ async function main() {
     console.log(`Found ${videoFiles.length} video file(s) to process`);
     let processed = 0;
     let failed = 0;
-    for (const videoFile of videoFiles) {
+    // a rejected prefetch is reported when processOneVideo awaits it
+    const prefetch = (promise) => { promise.catch(() => {}); return promise; };
+    let nextAudio = prefetch(prepareAudio(videoFiles[0], 0));
+    for (let videoIndex = 0; videoIndex < videoFiles.length; videoIndex++) {
+      const videoFile  = videoFiles[videoIndex];
+      const audioReady = nextAudio;
+      // extract the next video once this one's audio is ready
+      if (videoIndex + 1 < videoFiles.length)
+        nextAudio = prefetch(audioReady.catch(() => {}).then(() =>
+                      prepareAudio(videoFiles[videoIndex + 1], videoIndex + 1)));
       try {
-        await processOneVideo(videoFile);
+        await processOneVideo(videoFile, audioReady);
         processed++;
       } catch (err) {
         console.error(`[${ts()}] ❌ Failed: ${path.basename(videoFile)} - ${err.message}`);
@@ -792,7 +1096,6 @@ async function main() {
 (async () => {
   try {
     await run("ffmpeg", ["-version"]);
-    await run("ffprobe", ["-version"]);
     await main();
   } catch (err) {
     console.error(`[${ts()}] 💥 Error: ${err.message}`);